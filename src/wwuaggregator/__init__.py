@@ -1,7 +1,22 @@
 # Copyright 2022 WWU-OIE, Western Washington University
 # SPDX-License-Identifier: MIT License
+import contextlib
+import os
+from concurrent.futures import ThreadPoolExecutor
 import polars as pl
 
+# Dispatch table of the standard aggregations (shared by execute and _agg_of_complement); maps the name of the operation to a function building its Polars expression for a column.
+OP_EXPRS = {
+	"count": lambda c: pl.col(c).count(),
+	"count_distinct": lambda c: pl.col(c).n_unique(),
+	"max": lambda c: pl.col(c).max(),
+	"mean": lambda c: pl.col(c).mean(),
+	"median": lambda c: pl.col(c).median(),
+	"min": lambda c: pl.col(c).min(),
+	"std": lambda c: pl.col(c).std(),
+	"sum": lambda c: pl.col(c).sum(),
+}
+
 class WWU_Aggregator:
 	"""
 	This class aggregates datasets according to standard and custom functions.
@@ -50,24 +65,34 @@ class WWU_Aggregator:
 	############################################################################################
 	# PRIVATE METHODS
 	############################################################################################
-	def _convert_dimension_to_string(self, dimension):
+	def _convert_dimension_to_string(self, dataframe, dimension):
 		"""
-		Convert None/NaN-values in dimension columns to placeholder string (otherwise, the Pandas groupby-function will filter them out when aggregating).
+		Builds the expression that converts None/NaN-values in a dimension column to placeholder string (otherwise, the groupby-function will filter them out when aggregating).
 
 		Parameters:
-			dimension(str):  the name of the dimension in self.dataframe_var that needs to be converted to a string.
+			dataframe (polars.DataFrame):  the dataframe containing the dimension.
+			dimension (str):  the name of the dimension in the dataframe that needs to be converted to a string.
+
+		Returns:
+			polars.Expr: expression producing the converted dimension column (under the same name)
 		"""
+		dtype = dataframe[dimension].dtype
+
 		# If we pulled this dimension from a database column which had type Int but some records were NULL, Python will convert it to float64 for performance reasons (https://pandas.pydata.org/pandas-docs/stable/user_guide/gotchas.html#nan-integer-na-values-and-na-type-promotions).
 		# This becomes problematic when we convert these floats to strings because it appends ".0" to the string-value (i.e., survey id 332674 becomes 332674.0 and that looks weird).
 		# Therefore, we strip off the ".0" from the string if we detect that the original dataframe was type float64 and it contained NULLs.
-		convert_float = False  # initialize
-		if self.dataframe_var.dtypes[dimension] == "float64" and self.dataframe_var.isnull().values.any():
-			convert_float = True
+		# Only the literal ".0"-suffix is removed (i.e., 100.0 becomes 100 rather than 1, and 2.5 is left alone).
+		if dtype == pl.Float64 and sum(dataframe.null_count().row(0)) > 0:
+			return pl.col(dimension).cast(pl.Utf8).str.replace(r"\.0$", "").fill_null("(no value)")
+
+		if dtype == pl.Utf8:
+			return pl.col(dimension).fill_null("(no value)")
 
-		self.dataframe_var[dimension] = self.dataframe_var[dimension].fillna('(no value)')
+		# Other types can only hold the placeholder string once they are converted to strings; leave them be if there is nothing to fill.
+		if dataframe[dimension].null_count() > 0:
+			return pl.col(dimension).cast(pl.Utf8).fill_null("(no value)")
 
-		if convert_float:
-			self.dataframe_var[dimension] = self.dataframe_var[dimension].astype(str).str.rstrip(".0")
+		return pl.col(dimension)
 
 	############################################################################################
 	# CUSTOM AGGREGATION METHODS
@@ -86,11 +111,11 @@ class WWU_Aggregator:
 		Returns:
 			pandas.Series: Series of aggregated values (having groupby_columns as the index)
 		"""
-		### INITIALIZATION
-		key_set = set()  # initialize
-		aggregation_results_dict = dict() # initialize
+		if op not in OP_EXPRS:
+			raise ValueError(f"Unknown op: {op}")
 
-		df_aggregated = None  # initialize
+		### INITIALIZATION
+		df_aggregated_chunks = list()  # initialize
 		remove_extranneous_rows = False  # initialize
 
 		### DETERMINE THE "KEYS" (i.e., the things that we want to evaluate the complement of)
@@ -104,138 +129,113 @@ class WWU_Aggregator:
 			if groupby_col in complement_id_columns:
 				groupby_columns_adj.remove(groupby_col)
 
-		# generating a list of key-values for the complements
-		for rw in df.to_dicts():
-			el_lst = list()
-			for itm in complement_id_columns:
-				el_lst.append(rw[itm])
+		### DECOMPOSABLE OPERATIONS
+		# For count, mean, and sum, the aggregation over a key's complement can be derived from the aggregation over the whole dataframe less the
+		# aggregation over the key itself (ex. sum_of_complement = total_sum - key_sum; mean_of_complement = (total_sum - key_sum) / (total_n - key_n)).
+		# This lets us aggregate once by the groupby_columns instead of filtering and aggregating the dataframe once per key.
+		# The totals are simply the sums of the per-key partials within each group of the non-complement grouping-dimensions (or over the whole
+		# dataframe in the simple case, where there are no grouping-dimensions other than the complement_id columns), since every row belongs to exactly one key.
+		# The sums are only derived this way for integer columns, whose sums are exact (so long as they fit in the integer type); for float columns, the difference of
+		# the sums loses its precision when the total is much larger than the complement (ex. [1e17, 1.5, 2.25]), and so these are aggregated per key below.
+		# The standard deviation is not derived this way either, since the difference of the sums of squares loses its precision when the values are large and close together.
+		integer_dtypes = (pl.Int8, pl.Int16, pl.Int32, pl.Int64, pl.UInt8, pl.UInt16, pl.UInt32, pl.UInt64)
+		if op == "count" or (op in ("mean", "sum") and df[col].dtype in integer_dtypes):
+			if "aggregation_results" in groupby_columns:
+				raise Exception("Found entry 'aggregation_results' in groupby_columns. Aborting.")
+
+			# aggregate the partials for each key (and non-complement grouping-dimensions)
+			df_partials = df.groupby(groupby_columns).agg([
+				pl.count().alias("partial_rows"),
+				pl.col(col).count().alias("partial_count"),
+				pl.col(col).is_not_null().sum().cast(pl.Int64).alias("partial_n"),
+				# (the mean sums in Int64, so that the sums of narrower integer types do not wrap around)
+				(pl.col(col).cast(pl.Int64) if op == "mean" else pl.col(col)).sum().fill_null(0).alias("partial_sum"),
+			])
+
+			# subtract each key's partials from the totals to get the partials of its complement
+			# (the windowed totals of the sophisticated case only ever see counts and integer sums; std goes through the anti-join loop below in every grouping set)
+			def complement_of(partial):
+				if len(groupby_columns_adj) > 0:
+					return pl.col(partial).sum().over(groupby_columns_adj) - pl.col(partial)
+				return pl.col(partial).sum() - pl.col(partial)
+
+			complement_rows = complement_of("partial_rows")
+			complement_count = complement_of("partial_count")
+			complement_n = complement_of("partial_n")
+			complement_sum = complement_of("partial_sum")
+
+			# perform the aggregation
+			if op == "count":
+				aggregation_results = complement_count
+			elif op == "mean":
+				aggregation_results = pl.when(complement_n > 0).then(complement_sum / complement_n).otherwise(None)
+			else:
+				aggregation_results = complement_sum
 
-			key_set.add(tuple(el_lst))
+			df_aggregated = df_partials.with_columns([aggregation_results.alias("aggregation_results"), complement_rows.alias("complement_rows")])
 
-		### ITERATE OVER THE KEYS (processing the aggregation of the key's complement in each iteration)
-		for key_tuple in key_set:
-			# get the tuple into a dict so it can be used to filter the dataframe
-			dct = dict()
-			i=0
-			for itm in complement_id_columns:
-				dct[itm] = key_tuple[i]
-				i = i + 1
-
-			# remove rows from the dataframe in order to achieve the complement
-			df_complement = df.clone()
-
-			if "df_complement_index" in df_complement.columns:
-				raise Exception("df_complement already contains a column named df_complement_index.  Aborting.")
-			if "df_complement_keep" in df_complement.columns:
-				raise Exception("df_complement already contains a column named df_complement_keep.  Aborting.")
-			
-			df_complement = df_complement.with_column(pl.concat_list(complement_id_columns).alias("df_complement_index"))  # adding a column which contains a list of the elements in the complement_id
-
-			list_key_tuple = list(key_tuple)  # convert our current tuple to a list so that we can compare a list to a list
-
-			# Now that we have the "index" of our complement_id values as a column in our dataframe, we need to compare this to the tuple of our current iteration.
-			# By doing so, we can take out the rows that match our tuple and the remaining rows will be the complement of the tuple.
-			# However, we do not appear to be able to compare a collection to a collection using the filter-method of Polars; it seemed to want a single value.
-			# Therefore, we are iterating the dataframe on a row-by-row basis to populate a True/False series that will be used as a mask for filtering rows later.
-			# If the row matches our tuple, its keep_mask-value is False; otherwise, it is true.
-			# Then, we append the True/False series to our dataframe.  And finally, we filter the dataframe according to this True/False column.
-			# I expect we can find a more-performant way of doing this, and encourage us to do so if time allows and we experience a need to make things faster.
-			keep_mask = list()  # initialize
-			for rw in df_complement.rows():
-				if rw[df_complement.find_idx_by_name("df_complement_index")] == list_key_tuple:
-					keep_mask.append(False)
-				else:
-					keep_mask.append(True)
+			# In the sophisticated case, a key whose complement has no rows within a group of the non-complement grouping-dimensions has nothing to aggregate.
+			# (ex. "college" for "college,department", where each department belongs to a single college.)  Filter-out these rows.
+			if groupby_columns != complement_id_columns:
+				df_aggregated = df_aggregated.filter(pl.col("complement_rows") > 0)
+
+			df_aggregated = df_aggregated.select(groupby_columns_adj + ["aggregation_results"] + complement_id_columns)
+
+			### RETURN THE RESULTS
+			r = None
+			if len(df_aggregated) > 0:
+				r = df_aggregated
 
-			# Add the True/False series to the dataframe
-			df_complement = df_complement.with_column(pl.Series("df_complement_keep", keep_mask))
+			return r
 
-			# filter the dataframe to just the complement
-			df_complement = df_complement.filter(pl.col("df_complement_keep") == True)
+		# generating the distinct key-values for the complements (each row of keys_df is one key)
+		keys_df = df.select(complement_id_columns).unique(maintain_order=True)
+
+		### ITERATE OVER THE KEYS (processing the aggregation of the key's complement in each iteration)
+		# Each key's complement is described as a lazy query over df, so no copy of the dataframe is materialized per key; the queries are collected together after the loop.
+		lazy_df = df.lazy()
+		# The key-values are pulled out of keys_df in one conversion up front, rather than looking up each key's row inside the loop.
+		for key_idx, key_tuple in enumerate(keys_df.rows()):
+			# get the key into a one-row dataframe (having the dtypes of the original columns) so it can be used to filter the dataframe
+			key_row = keys_df.slice(key_idx, 1)
+
+			# remove rows from the dataframe in order to achieve the complement.
+			# An anti-join keeps only the rows of df that do NOT match our tuple, and is performed as a hash-based set-difference by Polars.
+			df_complement = lazy_df.join(key_row.lazy(), on=complement_id_columns, how="anti")
 
 			# perform the aggregation over the complement
 			if groupby_columns == complement_id_columns:
 				### SIMPLE CASE:  there are no grouping-dimensions other than the complement_id columns
-				# We are hand-crafting a dict of lists (essentially a dict of Series) that will be cast as a Polars DataFrame after aggregation.
-				if len(aggregation_results_dict) < 1:
-					if "aggregation_results" in complement_id_columns:
-						raise Exception("Found entry 'aggregation_results' in complement_id_columns. Aborting.")
-
-					# initialize the dict of lists
-					aggregation_results_dict["aggregation_results"] = list()
-					for complement_id_column in complement_id_columns:
-						aggregation_results_dict[complement_id_column] = list()
-
-				# populate this round's key_tuple values in the dict.  We will add the complement's aggregation later on.			
-				i = 0
-				while i < len(complement_id_columns):
-					aggregation_results_dict[complement_id_columns[i]].append(key_tuple[i])
-					i = i + 1
+				if "aggregation_results" in complement_id_columns:
+					raise Exception("Found entry 'aggregation_results' in complement_id_columns. Aborting.")
 
 				# perform the aggregation
-				if op == "count":
-					aggregation_results_dict["aggregation_results"].append(df_complement[col].count())
-				elif op == "count_distinct":
-					aggregation_results_dict["aggregation_results"].append(df_complement[col].n_unique())
-				elif op == "max":
-					aggregation_results_dict["aggregation_results"].append(df_complement[col].max())
-				elif op == "mean":
-					aggregation_results_dict["aggregation_results"].append(df_complement[col].mean())
-				elif op == "median":
-					aggregation_results_dict["aggregation_results"].append(df_complement[col].median())
-				elif op == "min":
-					aggregation_results_dict["aggregation_results"].append(df_complement[col].min())
-				elif op == "std":
-					aggregation_results_dict["aggregation_results"].append(df_complement[col].std())
-				elif op == "sum":
-					aggregation_results_dict["aggregation_results"].append(df_complement[col].sum())
-				else:
-					raise ValueError(f"Unknown op: {op}")
-
-				# convert dict of lists to Polars DataFrame
-				df_aggregated = pl.DataFrame(aggregation_results_dict)
+				ans = df_complement.select([OP_EXPRS[op](col)])
 
 			else:
 				### SOPHISTICATED CASE:  there are grouping-dimensions in addition to the complement_id columns
 				remove_extranneous_rows = True
 
 				# perform the aggregation
-				if op == "count":
-					ans = (df_complement.groupby(groupby_columns_adj).agg([pl.col(col).count()]))
-				elif op == "count_distinct":
-					ans = (df_complement.groupby(groupby_columns_adj).agg([pl.col(col).n_unique()]))
-				elif op == "max":
-					ans = (df_complement.groupby(groupby_columns_adj).agg([pl.col(col).max()]))
-				elif op == "mean":
-					ans = (df_complement.groupby(groupby_columns_adj).agg([pl.col(col).mean()]))
-				elif op == "median":
-					ans = (df_complement.groupby(groupby_columns_adj).agg([pl.col(col).median()]))
-				elif op == "min":
-					ans = (df_complement.groupby(groupby_columns_adj).agg([pl.col(col).min()]))
-				elif op == "std":
-					ans = (df_complement.groupby(groupby_columns_adj).agg([pl.col(col).std()]))
-				elif op == "sum":
-					ans = (df_complement.groupby(groupby_columns_adj).agg([pl.col(col).sum()]))
-				else:
-					raise ValueError(f"Unknown op: {op}")
-
-				ans = ans.rename({col:"aggregation_results"})  # names the aggregation-column
-
-				# ans will be a dataframe comprised of the non-complement grouping-dimensions and the aggregated values.  
-				# We need to add the tuple-values to the dataframe since it is serving as the "index" of the row.
-				#  (i.e., it tells us what this is the complement of)
-				# Ultimately, every row will contain the value of the aggregation, the "index"-columns used to determine the complement, and
-				# the columns used for additional groupings within the "index".
-				complement_id_column_idx = 0
-				for complement_id_column in complement_id_columns:
-					ans = ans.with_column(pl.lit(key_tuple[complement_id_column_idx]).alias(complement_id_column))
-					complement_id_column_idx = complement_id_column_idx + 1
-
-				# tack this key_tuple iteration onto the dataframe
-				if df_aggregated is None:
-					df_aggregated = ans
-				else:
-					df_aggregated = pl.concat([df_aggregated, ans], True, 'vertical')
+				ans = (df_complement.groupby(groupby_columns_adj).agg([OP_EXPRS[op](col)]))
+
+			ans = ans.rename({col:"aggregation_results"})  # names the aggregation-column
+
+			# ans will be a dataframe comprised of the non-complement grouping-dimensions and the aggregated values.  
+			# We need to add the tuple-values to the dataframe since it is serving as the "index" of the row.
+			#  (i.e., it tells us what this is the complement of)
+			# Ultimately, every row will contain the value of the aggregation, the "index"-columns used to determine the complement, and
+			# the columns used for additional groupings within the "index".
+			ans = ans.with_columns([pl.lit(key_value).cast(df[complement_id_column].dtype).alias(complement_id_column) for complement_id_column, key_value in zip(complement_id_columns, key_tuple)])
+
+			# tack this key_tuple iteration onto the list of results (concatenated once all of the keys have been processed)
+			df_aggregated_chunks.append(ans)
+
+		# With no keys (i.e., an empty dataframe) there is nothing to concatenate, and so nothing to return.
+		if len(df_aggregated_chunks) < 1:
+			return None
+
+		df_aggregated = pl.concat(pl.collect_all(df_aggregated_chunks), True, 'vertical')
 
 		### CLEAN UP
 		# The process for the sophisticated case has the capability of generating rows for complements of which there was no original subject.
@@ -244,7 +244,7 @@ class WWU_Aggregator:
 		# rather than the original subject (i.e., the current key_tuple).
 		# Filter-out these rows by validating that the current key was present in the original set.
 		if remove_extranneous_rows:
-			df_original_keys = df.select(groupby_columns).distinct()
+			df_original_keys = df.select(groupby_columns).unique()
 			df_aggregated = df_aggregated.join(df_original_keys, left_on=groupby_columns, right_on=groupby_columns)
 
 		### RETURN THE RESULTS
@@ -343,23 +343,17 @@ class WWU_Aggregator:
 			raise Exception("Either operations, dataframe, or dimensions_constant has not been set.")
 
 		# Validate that constant-dimensions and change-dimensions do not have overlapping elements; these will screw up how it evaluates "aggregation_dimensions_names_set" because it will match a term in the set according to the constant-dimension rather than according to the change-dimension.
-		constant_set = set()
-		for lst in self.dimensions_constant_var:
-			for sub_lst in lst:
-				constant_set.add(sub_lst)
-
-		# Convert None/NaN-values in constant-dimension columns to placeholder string (so we can get friendly "(no value)"-entries and avoid INTs converted to str getting ".0" at the end)
-		for constant_itm in constant_set:
-			self._convert_dimension_to_string(dimension=constant_itm)
-
-		if self.dimensions_change_var is not None:
-			change_set = set()
-			for lst in self.dimensions_change_var:
-				for sub_lst in lst:
-					change_set.add(sub_lst)
-					
-			if len(constant_set.intersection(change_set)) > 0:
-				raise ValueError("Constant dimension elements and change dimension elements must be mutually exclusive.")
+		constant_set = set().union(*self.dimensions_constant_var)
+		change_set = set().union(*(self.dimensions_change_var or []))
+
+		if len(constant_set.intersection(change_set)) > 0:
+			raise ValueError("Constant dimension elements and change dimension elements must be mutually exclusive.")
+
+		# convert DataFrame to polars for faster processing
+		dataframe_var = pl.DataFrame(self.dataframe_var)
+
+		# Convert None/NaN-values in dimension columns to placeholder string (so we can get friendly "(no value)"-entries and avoid INTs converted to str getting ".0" at the end)
+		dataframe_var = dataframe_var.with_columns([self._convert_dimension_to_string(dataframe=dataframe_var, dimension=dimension) for dimension in constant_set.union(change_set)])
 	
 		# Generate aggregation dimensions based off constant and change dimension lists.
 		# If no change dimensions are passed, then just use the constant dimensions.
@@ -367,24 +361,10 @@ class WWU_Aggregator:
 			self.groupby_var = self.dimensions_constant_var
 		# Else generate cartesian product of constant dimensions lists and change dimensions lists.
 		else:
-			dim_list = list()  # initialize
-			# iterate the list
-			for change_list in self.dimensions_change_var:
-				# Since we are already iterating change-dimensions here, let's also convert None/NaN to placeholder string (so we can get friendly "(no value)"-entries and avoid INTs converted to str getting ".0" at the end)
-				for change_itm in change_list:
-					self._convert_dimension_to_string(dimension=change_itm)
-
-				# append the list to each entry in the list of lists, and add it to the final list
-				for lst in self.dimensions_constant_var:
-					temp_list = list()
-					for itm in lst:
-						temp_list.append(itm)
-					for change_itm in change_list:
-						temp_list.append(change_itm)
-					dim_list.append(temp_list)
+			# append each change-dimension list to each entry in the constant-dimension list of lists
+			dim_list = [lst + change_list for change_list in self.dimensions_change_var for lst in self.dimensions_constant_var]
 			# add in the original entries from dim_list_constant
-			for lst in self.dimensions_constant_var:
-				dim_list.append(lst)
+			dim_list += self.dimensions_constant_var
 			self.groupby_var = dim_list
 
 		##########################################################
@@ -395,180 +375,211 @@ class WWU_Aggregator:
 		groupby_var = self.groupby_var
 		dimensions_change_var = self.dimensions_change_var
 		operations_var = self.operations_var
-		dataframe_var = self.dataframe_var
-
-		# convert DataFrame to polars for faster processing
-		dataframe_var = pl.DataFrame(dataframe_var)
-
-		# iterate through all of the grouping sets, and only pull the ones that should be processed by this thread
-		for i in range(len(groupby_var)):
-			dimension_dataset = None #initialize
 
-			# loop through aggregation operations
-			for op in operations_var:
-				operation = op["operation"]
-				column = op["column"]
+		# The aggregations are built up as lazy queries and collected all at once further down, which lets Polars optimize and run them in parallel.
+		lazy_dataframe_var = dataframe_var.lazy()
+		lazy_frames = list()  # initialize
+		lazy_frames_grouping_set_idx = list()  # initialize; index of the grouping set that each lazy query belongs to
+		aliases_by_grouping_set = [list() for _ in range(len(groupby_var))]  # initialize; aliases of the aggregations of each grouping set (in the order of the operations)
+
+		# The expressions of the simple aggregations are the same for every grouping set, so they are built (and aliased) once up front.
+		# Keyed by alias, so the same aggregation listed twice is only computed once.
+		groupby_exprs_dict = dict()  # initialize
+		for op in operations_var:
+			if op["operation"] in OP_EXPRS:
 				alias = f'{op["column"]}_{op["operation"]}'
+				groupby_exprs_dict[alias] = OP_EXPRS[op["operation"]](op["column"]).alias(alias)
+		groupby_exprs = list(groupby_exprs_dict.values())
+
+		# The complement aggregations are computed eagerly, so they are submitted to a thread pool to overlap them across the grouping sets (Polars releases the GIL while aggregating).
+		# Polars already parallelizes each aggregation internally, so the pool only uses half of the cores to avoid oversubscribing them.
+		# Each complement aggregation reserves its place in lazy_frames, and is filled in once all of the grouping sets have been submitted.
+		# The pool is only started when there are complement aggregations to run, and the with-statement shuts it down even if an aggregation (or the validation of a later operation) fails.
+		complement_futures = list()  # initialize; (index in lazy_frames, future, alias) for each complement aggregation
+		if any(str(op["operation"]).endswith("_of_complement") for op in operations_var):
+			complement_executor = ThreadPoolExecutor(max_workers=max(1, (os.cpu_count() or 1) // 2))
+		else:
+			complement_executor = contextlib.ExitStack()  # an empty ExitStack does nothing on exit
+
+		with complement_executor:
+			# iterate through all of the grouping sets, and only pull the ones that should be processed by this thread
+			for i in range(len(groupby_var)):
+				# The simple aggregations of this grouping set are fused into a single groupby, so that the groups only need to be hashed once.
+				# The fused query takes the place in lazy_frames of the first simple aggregation, which keeps the order of the columns in the output.
+				groupby_exprs_lazy_frames_idx = None  # initialize
+
+				# loop through aggregation operations
+				for op in operations_var:
+					operation = op["operation"]
+					column = op["column"]
+					alias = f'{op["column"]}_{op["operation"]}'
+
+					if operation in OP_EXPRS:
+						# reserve the place of the fused query
+						if groupby_exprs_lazy_frames_idx is None:
+							groupby_exprs_lazy_frames_idx = len(lazy_frames)
+							lazy_frames.append(None)
+							lazy_frames_grouping_set_idx.append(i)
+
+						aliases_by_grouping_set[i].append(alias)
+						continue
 
-				if str(operation).endswith("_of_complement"):
-					if "of_complement" not in op:
-						raise ValueError(f'The operation {operation} requires an "of_complement" parameter in order to determine what constitutes the complement, but none was provided.')
-					of_complement = op["of_complement"]
+					if str(operation).endswith("_of_complement"):
+						if "of_complement" not in op:
+							raise ValueError(f'The operation {operation} requires an "of_complement" parameter in order to determine what constitutes the complement, but none was provided.')
+						of_complement = op["of_complement"]
 
-					if type(of_complement) is not list:
-						raise ValueError(f"of_complement value for {operation} operation must be a list.  Received {type(of_complement)}: {of_complement}")
+						if type(of_complement) is not list:
+							raise ValueError(f"of_complement value for {operation} operation must be a list.  Received {type(of_complement)}: {of_complement}")
 
-					# For _of_complement operations, validate that the complement_id_columns are in the groupby_columns.
-					# If not, then the column should be blank values in the final dataset.
-					missing_complement_id_fields = set(of_complement) - set(groupby_var[i])
-					if len(missing_complement_id_fields) > 0:
+						# For _of_complement operations, validate that the complement_id_columns are in the groupby_columns.
+						# If not, then the column should be blank values in the final dataset.
+						missing_complement_id_fields = set(of_complement) - set(groupby_var[i])
+						if len(missing_complement_id_fields) > 0:
+							continue
+
+						# perform the aggregation (in the thread pool), and reserve its place
+						complement_future = complement_executor.submit(self._agg_of_complement, df = dataframe_var, col = column, op = str(operation)[:-len("_of_complement")], groupby_columns = groupby_var[i], complement_id_columns = of_complement)
+						complement_futures.append((len(lazy_frames), complement_future, alias))
+						lazy_frames.append(None)
+						lazy_frames_grouping_set_idx.append(i)
+						aliases_by_grouping_set[i].append(alias)
 						continue
+					elif operation == "percent_of_total_categorical":
+						# For percent_of_total_categorical, validate that the measure column is in the groupby_columns.
+						# If not, then the column should be blank values in the final dataset.
+						if column not in groupby_var[i]:
+							continue
 
-					# perform the aggregation
-					groupby_dataset = self._agg_of_complement(df = dataframe_var, col = column, op = str(operation).split("_")[0], groupby_columns = groupby_var[i], complement_id_columns = of_complement)
+						# create a dataframe of counts per value of the column
+						if "totals_dataset_count" in dataframe_var.columns:
+							raise ValueError('Dataframe already contains column named "totals_dataset_count"')
+						totals_counts = lazy_dataframe_var.groupby(groupby_var[i]).agg(pl.count()).rename({"count":"totals_dataset_count"})
 
-					# if there are no results (such as when the groupby_var[i] is a specialization of "of_complement"), just continue the loop
-					if groupby_dataset is None:
-						continue
-					else:
-						column = "aggregation_results"  # re-assigned for future-processing of column-renaming
-				elif operation == "count":
-					groupby_dataset = (dataframe_var.groupby(groupby_var[i]).agg([pl.col(column).count()]))
-				elif operation == "count_distinct":
-					groupby_dataset = (dataframe_var.groupby(groupby_var[i]).agg([pl.col(column).n_unique()]))
-				elif operation == "max":
-					groupby_dataset = (dataframe_var.groupby(groupby_var[i]).agg([pl.col(column).max()]))
-				elif operation == "mean":
-					groupby_dataset = (dataframe_var.groupby(groupby_var[i]).agg([pl.col(column).mean()]))
-				elif operation == "median":
-					groupby_dataset = (dataframe_var.groupby(groupby_var[i]).agg([pl.col(column).median()]))
-				elif operation == "min":
-					groupby_dataset = (dataframe_var.groupby(groupby_var[i]).agg([pl.col(column).min()]))
-				elif operation == "percent_of_total_categorical":
-					# For percent_of_total_categorical, validate that the measure column is in the groupby_columns.
-					# If not, then the column should be blank values in the final dataset.
-					if column not in groupby_var[i]:
-						continue
+						# create dataframe of parent-group counts
+						groupby_without_col = list()
+						for el in groupby_var[i]:
+							if el != column:
+								groupby_without_col.append(el)
 
-					# create a dataframe of counts per value of the column
-					if "totals_dataset_count" in dataframe_var.columns:
-						raise ValueError('Dataframe already contains column named "totals_dataset_count"')
-					totals_counts = dataframe_var.groupby(groupby_var[i]).agg(pl.count()).rename({"count":"totals_dataset_count"})
+						# The parent-group counts are the sums of the counts over the parent-groups, so they are computed as a window over the counts (rather than with another groupby and a join).
+						if len(groupby_without_col) > 0:
+							groupby_without_col_counts = pl.col("totals_dataset_count").sum().over(groupby_without_col)
+						else:
+							# if the only column in the grouping is the one we are trying to compute percent of total for, then calculate the size for the whole dataframe
+							groupby_without_col_counts = pl.col("totals_dataset_count").sum()
 
-					# create dataframe of parent-group counts
-					groupby_without_col = list()
-					for el in groupby_var[i]:
-						if el != column:
-							groupby_without_col.append(el)
+						# calculate the percent of total
+						if "percent_of_total_categorical" in totals_counts.columns:
+							raise ValueError('Dataframe already contains column named "percent_of_total_categorical"')
 
-					if len(groupby_without_col) > 0:
-						groupby_without_col_counts = dataframe_var.groupby(groupby_without_col).agg(pl.count())
+						groupby_dataset = totals_counts.with_columns([(pl.col("totals_dataset_count") / groupby_without_col_counts).alias("percent_of_total_categorical")])
 
-						if "groupby_without_col_counts_dataset_size" in dataframe_var.columns:
-							raise ValueError('Dataframe already contains column named "groupby_without_col_counts_dataset_size"')
+						# clean-up steps for later processing
+						column = "percent_of_total_categorical"  # ensures that the correct column is renamed with the alias further down in the code
+						groupby_dataset = groupby_dataset.drop("totals_dataset_count")  # drop column added to the dataframe during processing
 
-						groupby_without_col_counts_dataset = groupby_without_col_counts.rename({"count":"groupby_without_col_counts_dataset_size"})  # names the aggregation-column
+					elif operation == "percent_of_total_numeric":
+						if "of_total" not in op:
+							raise ValueError(f'The operation {operation} requires an "of_total" parameter in order to determine the total we are calculating respective of, but none was provided.  If you wish to calculate the total with respect to the entire dataset, you may use the wildcard "*".')
+						of_total = op["of_total"]
 
-						# merge the two dataframes
-						groupby_df = totals_counts.join(groupby_without_col_counts_dataset, left_on=groupby_without_col, right_on=groupby_without_col)
+						if of_total == "*" or of_total == ["*"]:
+							# This use-case is when you want the percent of total over all records.
+							# get dataframe summed at level of groupby_var
+							totals_sums = lazy_dataframe_var.groupby(groupby_var[i]).agg(pl.sum(column))
 
+							# calculate percent of total.
+							# Every row of the dataframe falls in exactly one group, so the sum over the whole dataframe is the sum of the group-sums;
+							# computing it from the group-sums gets the total within the same pass over the data (rather than scanning the column a second time).
+							if "percent_of_total_numeric" in totals_sums.columns:
+								raise ValueError('Dataframe already contains column named "percent_of_total_numeric"')
 
-						# calculate the percent of total
-						if "percent_of_total_categorical" in groupby_df.columns:
-							raise ValueError('Dataframe already contains column named "percent_of_total_categorical"')
-						
-						groupby_dataset = groupby_df.with_column(pl.lit(groupby_df["totals_dataset_count"] / groupby_df["groupby_without_col_counts_dataset_size"]).alias("percent_of_total_categorical"))
-						groupby_dataset = groupby_dataset.drop("groupby_without_col_counts_dataset_size")  # drop column added to the dataframe during processing
+							groupby_dataset = totals_sums.with_columns([(pl.col(column) / pl.col(column).sum()).alias("percent_of_total_numeric")])
 
-					else:
-						# if the only column in the grouping is the one we are trying to compute percent of total for, then calculate the size for the whole dataframe
-						len_dataframe_var = len(dataframe_var)
+							# clean-up steps for later processing
+							groupby_dataset = groupby_dataset.drop(column)  # drop column added to the dataframe during processing
+							column = "percent_of_total_numeric"  # ensures that the correct column is renamed with the alias further down in the code
 
-						if "percent_of_total_categorical" in totals_counts.columns:
-							raise ValueError('Dataframe already contains column named "percent_of_total_categorical"')
+						else:
+							# This use-case is when you want the percent of total for a specific grouping (such as percent of total for the year; each year sums up to 100%).
+							if type(of_total) is not list:
+								raise ValueError(f"of_total value for percent_of_total_numeric operation must be a list.  Received {type(of_total)}: {of_total}")
 
-						groupby_dataset = totals_counts.with_column(pl.lit(totals_counts["totals_dataset_count"] / len_dataframe_var).alias("percent_of_total_categorical"))
+							if column in of_total:
+								# we are computing summation for the column, so we cannot also list it separately as a value of the grouping
+								raise ValueError(f"Column for calculation ({column}) cannot be contained in list of_total: {of_total}")
 
-					# clean-up steps for later processing
-					column = "percent_of_total_categorical"  # ensures that the correct column is renamed with the alias further down in the code
-					groupby_dataset = groupby_dataset.drop("totals_dataset_count")  # drop column added to the dataframe during processing
+							# check to make sure that the of_total columns are actually in the dataframe
+							for el in of_total:
+								if el not in dataframe_var.columns:
+									raise ValueError(f"Element '{el}' in of_total {of_total} is not found in dataframe columns {dataframe_var.columns}")
 
-				elif operation == "percent_of_total_numeric":
-					if "of_total" not in op:
-						raise ValueError(f'The operation {operation} requires an "of_total" parameter in order to determine the total we are calculating respective of, but none was provided.  If you wish to calculate the total with respect to the entire dataset, you may use the wildcard "*".')
-					of_total = op["of_total"]
+							# the of_total group must be a subset of the groupby_var; otherwise, you would not be able to represent its values on the row.
+							check_lst = set(of_total) - set(groupby_var[i])
+							if len(check_lst) > 0:
+								continue
 
-					if of_total == "*" or of_total == ["*"]:
-						# This use-case is when you want the percent of total over all records.
-						# calculate the sum of the column over the whole dataframe
-						dataframe_var_sum = dataframe_var[column].sum()
+							# compute the sum for the of_total groups
+							of_total_sums = lazy_dataframe_var.groupby(of_total).agg(pl.sum(column)).rename({column:"of_total_sums_sum"})
 
-						# get dataframe summed at level of groupby_var
-						totals_sums = dataframe_var.groupby(groupby_var[i]).agg(pl.sum(column))
+							# compute the sum for the groupby_var groups
+							groupby_var_sums = lazy_dataframe_var.groupby(groupby_var[i]).agg(pl.sum(column)).rename({column:"groupby_var_sums_sum"})
 
-						# calculate percent of total
-						if "percent_of_total_numeric" in totals_sums.columns:
-							raise ValueError('Dataframe already contains column named "percent_of_total_numeric"')
+							# merge the two dfs
+							merged_df = of_total_sums.join(groupby_var_sums, left_on=of_total, right_on=of_total)
 
-						groupby_dataset = totals_sums.with_column(pl.lit(totals_sums[column] / dataframe_var_sum).alias("percent_of_total_numeric"))
+							# adjust the alias for the column (in case there are multiple cases where operation percent_of_total_numeric is performed using different of_total values)
+							for el in of_total:
+								alias = alias + "_" + el
+						
+							if alias in merged_df.columns:
+								raise ValueError(f'Dataframe already contains column named "{alias}"')
 
-						# clean-up steps for later processing
-						groupby_dataset = groupby_dataset.drop("percent_of_total_numeric")  # drop column added to the dataframe during processing
+							# calculate the percentage
+							groupby_dataset = merged_df.with_columns([(pl.col("groupby_var_sums_sum") / pl.col("of_total_sums_sum")).alias(alias)])
 
-					else:
-						# This use-case is when you want the percent of total for a specific grouping (such as percent of total for the year; each year sums up to 100%).
-						if type(of_total) is not list:
-							raise ValueError(f"of_total value for percent_of_total_numeric operation must be a list.  Received {type(of_total)}: {of_total}")
-
-						if column in of_total:
-							# we are computing summation for the column, so we cannot also list it separately as a value of the grouping
-							raise ValueError(f"Column for calculation ({column}) cannot be contained in list of_total: {of_total}")
-
-						# check to make sure that the of_total columns are actually in the dataframe
-						for el in of_total:
-							if el not in dataframe_var.columns:
-								raise ValueError(f"Element '{el}' in of_total {of_total} is not found in dataframe columns {dataframe_var.columns}")
-
-						# the of_total group must be a subset of the groupby_var; otherwise, you would not be able to represent its values on the row.
-						check_lst = set(of_total) - set(groupby_var[i])
-						if len(check_lst) > 0:
-							continue
+							# clean-up steps for later processing
+							column = alias  # ensures an error does not occur further down in the code
+							groupby_dataset = groupby_dataset.drop(["groupby_var_sums_sum", "of_total_sums_sum"])  # drop columns added to the dataframe during processing
 
-						# compute the sum for the of_total groups
-						of_total_sums = dataframe_var.groupby(of_total).agg(pl.sum(column)).rename({column:"of_total_sums_sum"})
 
-						# compute the sum for the groupby_var groups
-						groupby_var_sums = dataframe_var.groupby(groupby_var[i]).agg(pl.sum(column)).rename({column:"groupby_var_sums_sum"})
+					else:
+						raise NotImplementedError(f"Operation {operation} is not defined.")
 
-						# merge the two dfs
-						merged_df = of_total_sums.join(groupby_var_sums, left_on=of_total, right_on=of_total)
+					# name the aggregation-column
+					groupby_dataset = groupby_dataset.rename({column:alias})
 
-						# adjust the alias for the column (in case there are multiple cases where operation percent_of_total_numeric is performed using different of_total values)
-						for el in of_total:
-							alias = alias + "_" + el
-						
-						if alias in merged_df.columns:
-							raise ValueError(f'Dataframe already contains column named "{alias}"')
+					lazy_frames.append(groupby_dataset)
+					lazy_frames_grouping_set_idx.append(i)
+					aliases_by_grouping_set[i].append(alias)
 
-						# calculate the percentage
-						groupby_dataset = merged_df.with_column(pl.lit(merged_df["groupby_var_sums_sum"] / merged_df["of_total_sums_sum"]).alias(alias))
+				# perform the simple aggregations
+				if groupby_exprs_lazy_frames_idx is not None:
+					lazy_frames[groupby_exprs_lazy_frames_idx] = lazy_dataframe_var.groupby(groupby_var[i]).agg(groupby_exprs)
 
-						# clean-up steps for later processing
-						column = alias  # ensures an error does not occur further down in the code
-						groupby_dataset = groupby_dataset.drop("groupby_var_sums_sum")  # drop column added to the dataframe during processing
-						groupby_dataset = groupby_dataset.drop("of_total_sums_sum")  # drop column added to the dataframe during processing
+			# fill in the complement aggregations
+			for lazy_frames_idx, complement_future, alias in complement_futures:
+				groupby_dataset = complement_future.result()
 
+				# if there are no results (such as when the groupby_var[i] is a specialization of "of_complement"), leave the place empty
+				if groupby_dataset is not None:
+					lazy_frames[lazy_frames_idx] = groupby_dataset.lazy().rename({"aggregation_results":alias})  # name the aggregation-column
 
-				elif operation == "std":
-					groupby_dataset = (dataframe_var.groupby(groupby_var[i]).agg([pl.col(column).std()]))
-				elif operation == "sum":
-					groupby_dataset = (dataframe_var.groupby(groupby_var[i]).agg([pl.col(column).sum()]))
-				else:
-					raise NotImplementedError(f"Operation {operation} is not defined.")
+		# drop the places left empty
+		lazy_frames_grouping_set_idx = [idx for idx, lazy_frame in zip(lazy_frames_grouping_set_idx, lazy_frames) if lazy_frame is not None]
+		lazy_frames = [lazy_frame for lazy_frame in lazy_frames if lazy_frame is not None]
 
-				# name the aggregation-column
-				groupby_dataset = groupby_dataset.rename({column:alias})
+		# execute all of the lazy queries at once
+		groupby_datasets_by_grouping_set = [list() for _ in range(len(groupby_var))]
+		for groupby_dataset_idx, groupby_dataset in zip(lazy_frames_grouping_set_idx, pl.collect_all(lazy_frames)):
+			groupby_datasets_by_grouping_set[groupby_dataset_idx].append(groupby_dataset)
 
+		# merge the results of each grouping set
+		for i in range(len(groupby_var)):
+			dimension_dataset = None #initialize
+
+			for groupby_dataset in groupby_datasets_by_grouping_set[i]:
 				# do a merge so that aggregations appear on the same row 
 				if dimension_dataset is None: 
 					dimension_dataset = groupby_dataset
@@ -600,23 +611,48 @@ class WWU_Aggregator:
 						aggregation_dimensions_names_sorted_list.sort()
 
 						aggregation_dimensions_names_sorted_list_str = ",".join(aggregation_dimensions_names_sorted_list)
-						dimension_dataset = dimension_dataset.with_column(pl.lit(aggregation_dimensions_names_sorted_list_str).alias("agg_dim$names"))
 						
 						if len(aggregation_dimensions_names_sorted_list) > 0:
-							dimension_dataset = dimension_dataset.with_column(pl.concat_str(dimension_dataset[aggregation_dimensions_names_sorted_list],",").alias("agg_dim$values"))
+							aggregation_dimensions_values = pl.concat_str([pl.col(dimension) for dimension in aggregation_dimensions_names_sorted_list], ",")
 						else:
-							dimension_dataset = dimension_dataset.with_column(pl.lit("").alias("agg_dim$values"))
+							aggregation_dimensions_values = pl.lit("")
+
+						# add the names and the values of the change-dimensions in a single pass over the dataframe
+						dimension_dataset = dimension_dataset.with_columns([
+							pl.lit(aggregation_dimensions_names_sorted_list_str).alias("agg_dim$names"),
+							aggregation_dimensions_values.alias("agg_dim$values"),
+						])
 
 				else:
 					merge_cols = list(set(dimension_dataset.columns).intersection(groupby_dataset.columns))
 					dimension_dataset = dimension_dataset.join(groupby_dataset, on=merge_cols, how="outer")
 
+			# skip grouping sets for which none of the operations produced results
+			if dimension_dataset is None:
+				continue
+
+			# The fused simple aggregations land together ahead of agg_dim$names and agg_dim$values, so put the columns back in the order of the operations
+			# (the columns of the first aggregation, then agg_dim$names and agg_dim$values, then the remaining aggregations, as if each had been merged separately).
+			merged_aliases = list()  # initialize
+			for alias in aliases_by_grouping_set[i]:
+				if alias in dimension_dataset.columns and alias not in merged_aliases:
+					merged_aliases.append(alias)
+
+			ordered_columns = [column for column in groupby_datasets_by_grouping_set[i][0].columns if column not in merged_aliases[1:]]
+			ordered_columns += [column for column in ["agg_dim$names", "agg_dim$values"] if column in dimension_dataset.columns]
+			ordered_columns += merged_aliases[1:]
+			dimension_dataset = dimension_dataset.select(ordered_columns)
+
 			# Do a concat because different levels of aggregation occured (can't merge)
 			if return_dataset is None:
 				return_dataset = dimension_dataset
 			else:
 				return_dataset = pl.concat([return_dataset, dimension_dataset], True, 'diagonal')
 
+		# if none of the grouping sets produced results (such as for an empty dataframe with only _of_complement operations), return an empty dataframe having the dimensions of the first grouping set
+		if return_dataset is None:
+			return_dataset = dataframe_var.select(groupby_var[0]).head(0)
+
 		# convert DataFrame back to pandas
 		return_dataset = return_dataset.to_pandas()
 		return return_dataset